@@ -4,30 +4,165 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
 import os
+import re
 import string
-from dataclasses import asdict, dataclass
-from functools import wraps
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 import click
-import dbus_fast
-import dbus_fast.aio
-import rich.logging
-from gi.repository import Gio, GLib  # type: ignore
+
+# gi.repository is imported where it's needed so that e.g. --help
+# doesn't have to load the typelibs
+if TYPE_CHECKING:
+    from gi.repository import Gio, GLib  # type: ignore
 
 logger = logging.getLogger("uji")
-logger.addHandler(rich.logging.RichHandler())
 logger.setLevel(logging.ERROR)
 
+# Log level for the number of -v given
+_VERBOSE_LEVELS = {
+    0: logging.ERROR,
+    1: logging.INFO,
+    2: logging.DEBUG,
+}
+
+# Enum values as defined in the gsettings-desktop-schemas
+_PAD_ACTION = {
+    "none": 0,
+    "help": 1,
+    "switch-monitor": 2,
+    "keybinding": 3,
+}
+_STYLUS_ACTION = {
+    "left": 0,
+    "middle": 1,
+    "right": 2,
+    "back": 3,
+    "forward": 4,
+    "switch-monitor": 5,
+    "keybinding": 6,
+}
+_STYLUS_BUTTON_PREFIX = {
+    "primary": "button",
+    "secondary": "secondary-button",
+    "tertiary": "tertiary-button",
+}
+
+# Click parameter types shared between the subcommands
+_PAD_ACTION_CHOICE = click.Choice(list(_PAD_ACTION))
+_STYLUS_ACTION_CHOICE = click.Choice(list(_STYLUS_ACTION))
+_STYLUS_BUTTON_CHOICE = click.Choice(list(_STYLUS_BUTTON_PREFIX))
+_RING_DIR_CHOICE = click.Choice(["cw", "ccw"])
+_STRIP_DIR_CHOICE = click.Choice(["up", "down"])
+_BUTTON_CHOICE = click.Choice(string.ascii_uppercase)
+# Rings and strips are named A-Z in the schema paths
+_PAD_FEATURE_NUMBER = click.IntRange(1, len(string.ascii_uppercase))
+
+# Gio.Settings objects by (schema, path), a single invocation may look up
+# the same path more than once
+_SETTINGS_CACHE: dict[tuple[str, str], Gio.Settings] = {}
+
+
+@lru_cache(maxsize=None)
+def _get_schema(schema: str) -> Gio.SettingsSchema:
+    from gi.repository import Gio  # type: ignore
+
+    source = Gio.SettingsSchemaSource.get_default()
+    schema_obj = source.lookup(schema, True) if source is not None else None
+    if schema_obj is None:
+        msg = f"GSettings schema {schema} is not installed"
+        raise click.ClickException(msg)
+    return schema_obj
+
+
+def _get_settings(schema: str, path: str) -> Gio.Settings:
+    try:
+        return _SETTINGS_CACHE[(schema, path)]
+    except KeyError:
+        from gi.repository import Gio  # type: ignore
+
+        settings = Gio.Settings.new_full(_get_schema(schema), None, path)
+        _SETTINGS_CACHE[(schema, path)] = settings
+        return settings
+
+
+@lru_cache(maxsize=None)
+def _variant_array_element(signature: str):
+    """
+    Returns the element type and constructor for the array keys we write.
+    Building the array from these directly avoids parsing the type string
+    in GLib.Variant() on every call.
+    """
+    from gi.repository import GLib  # type: ignore
+
+    return {
+        "ad": (GLib.VariantType.new("d"), GLib.Variant.new_double),
+        "ai": (GLib.VariantType.new("i"), GLib.Variant.new_int32),
+    }[signature]
+
+
+def _new_array(signature: str, values) -> GLib.Variant:
+    from gi.repository import GLib  # type: ignore
+
+    element_type, new_element = _variant_array_element(signature)
+    return GLib.Variant.new_array(element_type, [new_element(v) for v in values])
+
+
+@contextmanager
+def _delayed(settings: Gio.Settings):
+    """
+    Collect all writes to settings within this context and commit them to
+    dconf in one go. Nothing is written if the block raises.
+
+    delay() cannot be undone, the object stays in delay-apply mode. It is
+    thus dropped from the _get_settings() cache so later lookups get a fresh
+    object, and any further writes to this object must go through
+    _delayed() again.
+    """
+    key = (settings.props.schema_id, settings.props.path)
+    if _SETTINGS_CACHE.get(key) is settings:
+        del _SETTINGS_CACHE[key]
+    settings.delay()
+    try:
+        yield settings
+    except BaseException:
+        settings.revert()
+        raise
+    settings.apply()
+
+
+_USBID_RE = re.compile(r"(?:0[xX])?([0-9a-fA-F]+):(?:0[xX])?([0-9a-fA-F]+)")
+# Hex digits per ID in the dconf paths
+_USBID_DIGITS = 4
+
+
+@lru_cache(maxsize=128)
+def _parse_usbid(usbid: str) -> str:
+    """
+    Validate a vid:pid string and normalize it to the 1234:abcd form used
+    in the dconf paths.
+    """
+    m = _USBID_RE.fullmatch(usbid)
+    ids = [x.lstrip("0").zfill(_USBID_DIGITS) for x in m.groups()] if m is not None else []
+    if not ids or any(len(x) > _USBID_DIGITS for x in ids):
+        msg = f"Invalid vendor/product ID '{usbid}', expected the form 1234:abcd"
+        raise click.UsageError(msg)
+    return ":".join(ids).lower()
+
 
 @dataclass
 class Settings:
     path: str
     settings: Gio.Settings
 
+    def __post_init__(self):
+        self._keys = frozenset(self.settings.props.settings_schema.list_keys())
+
     def set_value(self, key, value):
         if self.has_key(key):
             self.settings.set_value(key, value)
@@ -46,6 +181,12 @@ class Settings:
         else:
             click.secho(f"WARNING: {key} does not exist in the schema, ignoring")
 
+    def set_strv(self, key, value):
+        if self.has_key(key):
+            self.settings.set_strv(key, value)
+        else:
+            click.secho(f"WARNING: {key} does not exist in the schema, ignoring")
+
     def set_boolean(self, key, value):
         if self.has_key(key):
             self.settings.set_boolean(key, value)
@@ -53,43 +194,52 @@ class Settings:
             click.secho(f"WARNING: {key} does not exist in the schema, ignoring")
 
     def has_key(self, key) -> bool:
-        return self.settings.props.settings_schema.has_key(key)
+        return key in self._keys
 
     def get_value(self, key):
         return self.settings.get_value(key)
 
     @classmethod
-    def for_tablet(cls, vid: int, pid: int):
-        path = f"/org/gnome/desktop/peripherals/tablets/{vid:04x}:{pid:04x}/"
+    def for_tablet(cls, usbid: str):
+        """
+        usbid is the lowercase vid:pid in the form 1234:abcd
+        """
+        path = f"/org/gnome/desktop/peripherals/tablets/{usbid}/"
         schema = "org.gnome.desktop.peripherals.tablet"
-        return cls(path, Gio.Settings.new_with_path(schema, path))
+        return cls(path, _get_settings(schema, path))
 
     @classmethod
     def for_stylus_with_serial(cls, serial):
         path = f"/org/gnome/desktop/peripherals/stylus/{serial:x}/"
         schema = "org.gnome.desktop.peripherals.tablet.stylus"
-        return cls(path, Gio.Settings.new_with_path(schema, path))
+        return cls(path, _get_settings(schema, path))
 
     @classmethod
-    def for_stylus(cls, vid: int, pid: int):
-        path = f"/org/gnome/desktop/peripherals/stylus/default-{vid:04x}:{pid:04x}/"
+    def for_stylus(cls, usbid: str):
+        """
+        usbid is the lowercase vid:pid of the tablet in the form 1234:abcd
+        """
+        path = f"/org/gnome/desktop/peripherals/stylus/default-{usbid}/"
         schema = "org.gnome.desktop.peripherals.tablet.stylus"
-        return cls(path, Gio.Settings.new_with_path(schema, path))
+        return cls(path, _get_settings(schema, path))
 
 
-def print_tablet_settings(settings, indent=0):
+def tablet_settings_lines(settings, indent=0) -> list[str]:
     indent = " " * indent
     keys = ("area", "keep-aspect", "left-handed", "mapping", "output")
-    click.echo(f"{indent}settings:")
-    for key in filter(lambda k: settings.has_key(k), keys):
+    lines = [f"{indent}settings:"]
+    for key in keys:
+        if not settings.has_key(key):
+            continue
         value = settings.get_value(key)
         comment = ""
         if key == "output" and all(not v for v in value):
             comment = "  # not mapped to any monitor"
-        click.echo(f"{indent}  {key}: {value}{comment}")
+        lines.append(f"{indent}  {key}: {value}{comment}")
+    return lines
 
 
-def print_stylus_settings(settings, indent=0):
+def stylus_settings_lines(settings, indent=0) -> list[str]:
     keys = (
         "pressure-curve",
         "eraser-pressure-curve",
@@ -103,21 +253,33 @@ def print_stylus_settings(settings, indent=0):
         "tertiary-button-keybinding",
     )
     indent = " " * indent
-    click.echo(f"{indent}settings:")
-    for key in filter(lambda k: settings.has_key(k), keys):
-        click.echo(f"{indent}  {key}: {settings.get_value(key)}")
+    lines = [f"{indent}settings:"]
+    for key in keys:
+        if not settings.has_key(key):
+            continue
+        lines.append(f"{indent}  {key}: {settings.get_value(key)}")
+    return lines
+
+
+def print_tablet_settings(settings, indent=0):
+    click.echo("\n".join(tablet_settings_lines(settings, indent)))
+
+
+def print_stylus_settings(settings, indent=0):
+    click.echo("\n".join(stylus_settings_lines(settings, indent)))
 
 
 @click.group()
 @click.option("-v", "--verbose", count=True, help="increase verbosity")
 @click.option("--quiet", "verbose", flag_value=0)
 def gsetwacom(verbose: int):
-    verbose_levels = {
-        0: logging.ERROR,
-        1: logging.INFO,
-        2: logging.DEBUG,
-    }
-    logger.setLevel(verbose_levels.get(verbose, 0))
+    # Only pay for importing rich if we're going to log anything
+    if verbose and not logger.handlers:
+        import rich.logging
+
+        logger.addHandler(rich.logging.RichHandler())
+
+    logger.setLevel(_VERBOSE_LEVELS.get(verbose, 0))
 
 
 @gsetwacom.command()
@@ -136,37 +298,43 @@ def list_tablets():
         vid: int
         pid: int
 
-    tablets = []
-    context = pyudev.Context()
-    for device in filter(
-        lambda d: Path(d.sys_path).name.startswith("event"),
-        context.list_devices(subsystem="input"),
-    ):
-        if (
-            device.get("ID_INPUT_TABLET", "0") != "1"
-            or device.get("ID_INPUT_TABLET_PAD", "0") == "1"
-            or device.get("ID_INPUT_TOUCHPAD", "0") == "1"
-        ):
-            continue
+    def to_tablet(device) -> Tablet | None:
+        props = device.properties
+        if props.get("ID_INPUT_TABLET_PAD", "0") == "1" or props.get("ID_INPUT_TOUCHPAD", "0") == "1":
+            return None
 
-        vid = int(device.get("ID_VENDOR_ID", "0"), 16)
-        pid = int(device.get("ID_MODEL_ID", "0"), 16)
-        name = device.get("NAME")
+        vid = int(props.get("ID_VENDOR_ID", "0"), 16)
+        pid = int(props.get("ID_MODEL_ID", "0"), 16)
+        name = props.get("NAME")
         if name is None:
-            name = next(device.ancestors).get("NAME")
-        name = name.lstrip('"').rstrip('"')
-        tablets.append(Tablet(name, vid, pid))
+            # NAME is set on the inputN parent of our eventN node
+            parent = device.parent
+            name = parent.properties.get("NAME", "") if parent is not None else ""
+        if len(name) > 1 and name[0] == name[-1] == '"':
+            name = name[1:-1]
+        return Tablet(name, vid, pid)
+
+    context = pyudev.Context()
+    # Let libudev do the filtering, multiple match_property() calls are OR-ed
+    # so the pad/touchpad exclusion has to stay in Python
+    devices = context.list_devices(subsystem="input").match_property("ID_INPUT_TABLET", "1").match_sys_name("event*")
+    tablets = [t for t in map(to_tablet, devices) if t is not None]
 
     if not tablets:
         click.secho("No devices found")
         return
 
-    click.echo("devices:")
+    lines = ["devices:"]
     for tablet in tablets:
-        click.echo(f'- name: "{tablet.name}"')
-        click.echo(f'  usbid: "{tablet.vid:04X}:{tablet.pid:04X}"')
-        settings = Settings.for_tablet(tablet.vid, tablet.pid)
-        print_tablet_settings(settings, indent=2)
+        lines.append(f'- name: "{tablet.name}"')
+        lines.append(f'  usbid: "{tablet.vid:04X}:{tablet.pid:04X}"')
+        settings = Settings.for_tablet(f"{tablet.vid:04x}:{tablet.pid:04x}")
+        lines.extend(tablet_settings_lines(settings, indent=2))
+    click.echo("\n".join(lines))
+
+
+# Section headers in the gnome-control-center tools file
+_SECTION_RE = re.compile(r"^\s*\[(.+)\]\s*$", re.MULTILINE)
 
 
 @gsetwacom.command()
@@ -180,21 +348,25 @@ def list_styli():
     be available until it has been brought into proximity above the
     control center.
     """
-    from configparser import ConfigParser
-
     xdg = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
-    config = ConfigParser()
-    config.read(xdg / "gnome-control-center" / "wacom" / "tools")
-    if not config.sections():
+    path = xdg / "gnome-control-center" / "wacom" / "tools"
+    # This is an ini-style file but we only need the section names
+    try:
+        sections = _SECTION_RE.findall(path.read_text())
+    except OSError:
+        sections = []
+
+    if not sections:
         click.secho("No styli found")
         return
 
-    click.echo("styli:")
-    for section in config.sections():
-        click.echo(f"- serial number: {section}")
+    lines = ["styli:"]
+    for section in sections:
+        lines.append(f"- serial number: {section}")
         serial = int(section, 16)
         settings = Settings.for_stylus_with_serial(serial)
-        print_stylus_settings(settings, indent=2)
+        lines.extend(stylus_settings_lines(settings, indent=2))
+    click.echo("\n".join(lines))
 
 
 @gsetwacom.group()
@@ -206,8 +378,7 @@ def tablet(ctx, device):
 
     DEVICE is a vendor/product ID tuple in the form 1234:abcd.
     """
-    vid, pid = (int(x, 16) for x in device.split(":"))
-    ctx.obj = Settings.for_tablet(vid, pid)
+    ctx.obj = Settings.for_tablet(_parse_usbid(device))
 
 
 @tablet.command(name="show")
@@ -249,10 +420,10 @@ def tablet_set_keep_aspect(ctx, keep_aspect_ratio: bool):
 @click.pass_context
 def tablet_set_absolute(ctx, absolute: bool):
     """
-    Change the left-handed configuration of this device
+    Change the mapping of this device to absolute or relative mode
     """
     settings = ctx.obj
-    settings.set_boolean("absolute", "absolute" if absolute else "relative")
+    settings.set_string("mapping", "absolute" if absolute else "relative")
 
 
 @tablet.command(name="set-area")
@@ -266,32 +437,24 @@ def tablet_set_area(ctx, x1: float, y1: float, x2: float, y2: float):
     Change the area the tablet is mapped to. All input parameters are percentages.
     """
     settings = ctx.obj
-    settings.set_value("area", GLib.Variant("ad", [x1, y1, x2, y2]))
-
-
-def coro(f):
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        return asyncio.run(f(*args, **kwargs))
-
-    return wrapper
+    settings.set_value("area", _new_array("ad", [x1, y1, x2, y2]))
 
 
 @tablet.command(name="map-to-monitor")
-@coro
 @click.option("--vendor", type=str, default=None)
 @click.option("--product", type=str, default=None)
 @click.option("--serial", type=str, default=None)
 @click.option("--connector", type=str, default=None)
 @click.option("--list-monitors", is_flag=True, default=False, help="List all currently connected monitors")
 @click.pass_context
-async def tablet_map_to_monitor(
+def tablet_map_to_monitor(
     ctx, vendor: str | None, product: str | None, serial: str | None, connector: str | None, list_monitors: bool
 ):
     """
     Map the tablet to a given monitor. The monitor may be specified with one or more
     of the vendor, product, serial or connector.
     """
+    # Same order as the monitor spec tuple
     args = {
         "connector": connector,
         "vendor": vendor,
@@ -302,46 +465,47 @@ async def tablet_map_to_monitor(
         msg = "One of --vendor, --product, --serial or --connector has to be provided"
         raise click.UsageError(msg)
 
-    bus = await dbus_fast.aio.MessageBus().connect()
-    busname = "org.gnome.Mutter.DisplayConfig"
-    objpath = "/org/gnome/Mutter/DisplayConfig"
-    intf = "org.gnome.Mutter.DisplayConfig"
-    introspection = await bus.introspect(busname, objpath)
-
-    proxy_object = bus.get_proxy_object(busname, objpath, introspection)
-    interface = proxy_object.get_interface(intf)
-
-    state = await interface.call_get_current_state()
-    _, monitors, _, _ = state  # serial, monitors, logical_monitors, properties
-
-    @dataclass
-    class Monitor:
-        connector: str
-        vendor: str
-        product: str
-        serial: str
-
-    monitors = [Monitor(*mdata) for (mdata, *_) in monitors]
+    # Index into the (connector, vendor, product, serial) monitor spec for each
+    # value we need to match, computed before we go to the bus
+    wanted = [(i, args[key]) for i, key in enumerate(args) if args[key] is not None]
+
+    from gi.repository import Gio, GLib  # type: ignore
+
+    try:
+        bus = Gio.bus_get_sync(Gio.BusType.SESSION, None)
+        reply = bus.call_sync(
+            "org.gnome.Mutter.DisplayConfig",
+            "/org/gnome/Mutter/DisplayConfig",
+            "org.gnome.Mutter.DisplayConfig",
+            "GetCurrentState",
+            None,
+            None,
+            Gio.DBusCallFlags.NONE,
+            -1,
+            None,
+        )
+    except GLib.Error as e:
+        msg = f"Unable to fetch the current monitor configuration: {e.message}"
+        raise click.ClickException(msg) from e
+
+    _, monitors, _, _ = reply.unpack()  # serial, monitors, logical_monitors, properties
+
+    # Each monitor's spec is a (connector, vendor, product, serial) tuple
+    monitors = [mdata for (mdata, *_) in monitors]
 
     def print_list():
-        msg = [f"- on {m.connector}: '{m.vendor}' '{m.product}' with serial no '{m.serial}'" for m in monitors]
+        msg = [f"- on {c}: '{v}' '{p}' with serial no '{s}'" for (c, v, p, s) in monitors]
         return "\n".join(msg)
 
     if list_monitors:
         click.echo(print_list())
     else:
-        for monitor in monitors:
-            logger.info("Monitor on %s vendor '%s' product '%s' serial '%s'", *asdict(monitor).values())
-            if any(args[key] is not None and args[key] != getattr(monitor, key) for key in args):
+        for mdata in monitors:
+            logger.info("Monitor on %s vendor '%s' product '%s' serial '%s'", *mdata)
+            if any(mdata[i] != value for i, value in wanted):
                 continue
             settings = ctx.obj
-            settings.set_value(
-                "output",
-                GLib.Variant(
-                    "as",
-                    [monitor.vendor, monitor.product, monitor.serial, monitor.connector],
-                ),
-            )
+            settings.set_strv("output", [mdata[1], mdata[2], mdata[3], mdata[0]])
             break
         else:
             msg = f"Unable to find this monitor in the current configuration. Available monitors:\n{print_list()}"
@@ -350,7 +514,7 @@ async def tablet_map_to_monitor(
 
 
 def change_action(path: str, action: str, keybinding: str | None):
-    settings = Gio.Settings.new_with_path("org.gnome.desktop.peripherals.tablet.pad-button", path)
+    settings = _get_settings("org.gnome.desktop.peripherals.tablet.pad-button", path)
 
     if action == "keybinding":
         if keybinding is None:
@@ -361,28 +525,26 @@ def change_action(path: str, action: str, keybinding: str | None):
             msg = "Keybinding is only valid for action keybinding"
             raise click.UsageError(msg)
 
-    val = {
-        "none": 0,
-        "help": 1,
-        "switch-monitor": 2,
-        "keybinding": 3,
-    }[action]
+    val = _PAD_ACTION[action]
 
-    if keybinding is not None:
-        settings.set_string("keybinding", keybinding)
-    settings.set_enum("action", val)
+    # skip any key that wouldn't change
+    with _delayed(settings):
+        if keybinding is not None and settings.get_string("keybinding") != keybinding:
+            settings.set_string("keybinding", keybinding)
+        if settings.get_enum("action") != val:
+            settings.set_enum("action", val)
 
 
 @tablet.command(name="set-ring-action")
-@click.option("--ring", type=int, default=1, help="The ring number to change")
+@click.option("--ring", type=_PAD_FEATURE_NUMBER, default=1, help="The ring number to change")
 @click.option("--mode", type=int, default=0, help="The zero-indexed mode")
 @click.option(
     "--direction",
-    type=click.Choice(["cw", "ccw"]),
+    type=_RING_DIR_CHOICE,
     default="cw",
     help="The ring movement direction",
 )
-@click.argument("action", type=click.Choice(["none", "help", "switch-monitor", "keybinding"]))
+@click.argument("action", type=_PAD_ACTION_CHOICE)
 @click.argument(
     "keybinding",
     type=str,
@@ -393,22 +555,22 @@ def tablet_set_ring_action(ctx, ring: int, mode: int, direction: str, action: st
     """
     Change the action the tablet ring is mapped to for a movement direction and in a given mode.
     """
-    r = chr(ord("A") + ring - 1)  # ring 1 -> ringA
+    r = string.ascii_uppercase[ring - 1]  # ring 1 -> ringA
     subpath = f"ring{r}-{direction}-mode-{mode}"
     path = f"{ctx.obj.path}{subpath}/"
     change_action(path, action, keybinding)
 
 
 @tablet.command(name="set-strip-action")
-@click.option("--strip", type=int, default=1, help="The strip number to change")
+@click.option("--strip", type=_PAD_FEATURE_NUMBER, default=1, help="The strip number to change")
 @click.option("--mode", type=int, default=0, help="The zero-indexed mode")
 @click.option(
     "--direction",
-    type=click.Choice(["up", "down"]),
+    type=_STRIP_DIR_CHOICE,
     default="cw",
     help="The strip movement direction",
 )
-@click.argument("action", type=click.Choice(["none", "help", "switch-monitor", "keybinding"]))
+@click.argument("action", type=_PAD_ACTION_CHOICE)
 @click.argument(
     "keybinding",
     type=str,
@@ -419,15 +581,15 @@ def tablet_set_strip_action(ctx, strip: int, mode: int, direction: str, action:
     """
     Change the action the tablet strip is mapped to for a movement direction and in a given mode.
     """
-    r = chr(ord("A") + strip - 1)  # strip 1 -> stripA
+    r = string.ascii_uppercase[strip - 1]  # strip 1 -> stripA
     subpath = f"strip{r}-{direction}-mode-{mode}"
     path = f"{ctx.obj.path}{subpath}/"
     change_action(path, action, keybinding)
 
 
 @tablet.command(name="set-button-action")
-@click.argument("button", type=click.Choice(string.ascii_uppercase))
-@click.argument("action", type=click.Choice(["none", "help", "switch-monitor", "keybinding"]))
+@click.argument("button", type=_BUTTON_CHOICE)
+@click.argument("action", type=_PAD_ACTION_CHOICE)
 @click.argument(
     "keybinding",
     type=str,
@@ -454,10 +616,13 @@ def stylus(ctx, stylus):
     tool serials it is the vendor/product ID tuple of the tablet in the form 1234:abcd.
     """
     if ":" in stylus:
-        vid, pid = (int(x, 16) for x in stylus.split(":"))
-        settings = Settings.for_stylus(vid, pid)
+        settings = Settings.for_stylus(_parse_usbid(stylus))
     else:
-        serial = int(stylus, 16)
+        try:
+            serial = int(stylus, 16)
+        except ValueError:
+            msg = f"Invalid stylus '{stylus}', expected a hexadecimal serial or the form 1234:abcd"
+            raise click.UsageError(msg) from None
         settings = Settings.for_stylus_with_serial(serial)
 
     ctx.obj = settings
@@ -488,7 +653,7 @@ def stylus_set_pressure_curve(ctx, eraser: bool, x1: int, y1: int, x2: int, y2:
     """
     settings = ctx.obj
     key = "eraser-pressure-curve" if eraser else "pressure-curve"
-    settings.set_value(key, GLib.Variant("ai", [x1, y1, x2, y2]))
+    settings.set_value(key, _new_array("ai", [x1, y1, x2, y2]))
 
 
 @stylus.command(name="set-pressure-range")
@@ -504,14 +669,12 @@ def stylus_set_pressure_range(ctx, eraser: bool, minimum: int, maximum: int):
     """
     settings = ctx.obj
     key = "eraser-pressure-range" if eraser else "pressure-range"
-    settings.set_value(key, GLib.Variant("ai", [minimum, maximum]))
+    settings.set_value(key, _new_array("ai", [minimum, maximum]))
 
 
 @stylus.command(name="set-button-action")
-@click.argument("button", type=click.Choice(["primary", "secondary", "tertiary"]))
-@click.argument(
-    "action", type=click.Choice(["left", "middle", "right", "back", "forward", "switch-monitor", "keybinding"])
-)
+@click.argument("button", type=_STYLUS_BUTTON_CHOICE)
+@click.argument("action", type=_STYLUS_ACTION_CHOICE)
 @click.argument(
     "keybinding",
     type=str,
@@ -533,22 +696,20 @@ def stylus_set_button_action(ctx, button: str, action: str, keybinding: str | No
 
     settings = ctx.obj
 
-    button_prefix = {
-        "primary": "button",
-        "secondary": "secondary-button",
-        "tertiary": "tertiary-button",
-    }[button]
+    button_prefix = _STYLUS_BUTTON_PREFIX[button]
 
-    if keybinding is not None:
-        key = f"{button_prefix}-keybinding"
-        if action == "keybinding" and not settings.has_key(key):
-            click.secho("Stylus button keybindings require GNOME 47 or later, aborting")
-            return
-        settings.set_string(key, keybinding)
+    keybinding_key = f"{button_prefix}-keybinding"
+    if keybinding is not None and action == "keybinding" and not settings.has_key(keybinding_key):
+        click.secho("Stylus button keybindings require GNOME 47 or later, aborting")
+        return
 
     key = f"{button_prefix}-action"
-    val = {"left": 0, "middle": 1, "right": 2, "back": 3, "forward": 4, "switch-monitor": 5, "keybinding": 6}[action]
-    settings.set_enum(key, val)
+    val = _STYLUS_ACTION[action]
+
+    with _delayed(settings.settings):
+        if keybinding is not None:
+            settings.set_string(keybinding_key, keybinding)
+        settings.set_enum(key, val)
 
 
 def main():
@@ -1,5 +1,38 @@
 # SPDX-License-Identifier: MIT
 
+import click
+import pytest
+
+
 # fake test so pytest exits with zero
 def test_removeme():
     pass
+
+
+def test_import():
+    import gsetwacom
+
+    assert hasattr(gsetwacom, "change_action")
+
+
+@pytest.mark.parametrize(
+    ("usbid", "expected"),
+    [
+        ("056A:0357", "056a:0357"),
+        ("56a:357", "056a:0357"),
+        ("0256C:0066", "256c:0066"),
+        ("0x56a:0x357", "056a:0357"),
+    ],
+)
+def test_parse_usbid(usbid, expected):
+    from gsetwacom import _parse_usbid
+
+    assert _parse_usbid(usbid) == expected
+
+
+@pytest.mark.parametrize("usbid", ["zzzz:1234", "12345:0001", "056a", "056a:0357:1"])
+def test_parse_usbid_invalid(usbid):
+    from gsetwacom import _parse_usbid
+
+    with pytest.raises(click.UsageError):
+        _parse_usbid(usbid)